@@ -1,432 +1,642 @@
-#!/usr/bin/env python3
-"""
-Autodesk Construction Cloud Forms Client
-Contains classes for authenticating and fetching forms data
-"""
-
-import requests
-import json
-import base64
-import os
-import time
-import threading
-import webbrowser
-import urllib.parse
-import csv
-import logging
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import List, Dict, Any
-from datetime import datetime
-import urllib3
-
-# Suppress SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-logger = logging.getLogger(__name__)
-
-class AutodeskAuthenticator:
-    """Handles Autodesk OAuth authentication"""
-    
-    def __init__(self, client_id: str, client_secret: str):
-        self.client_id = client_id
-        self.client_secret = client_secret
-        self.access_token = None
-        self.refresh_token = None
-    
-    def authenticate(self) -> bool:
-        """Perform OAuth authentication"""
-        
-        # For web deployment, we'll use client credentials flow
-        # This requires your Autodesk app to be configured for server-to-server auth
-        return self.authenticate_client_credentials()
-    
-    def authenticate_client_credentials(self) -> bool:
-        """Authenticate using client credentials flow (for server-to-server)"""
-        
-        auth_string = f"{self.client_id}:{self.client_secret}"
-        auth_header = base64.b64encode(auth_string.encode()).decode()
-        
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Authorization': f'Basic {auth_header}'
-        }
-        
-        data = {
-            'grant_type': 'client_credentials',
-            'scope': 'data:read account:read'
-        }
-        
-        try:
-            response = requests.post(
-                'https://developer.api.autodesk.com/authentication/v2/token',
-                headers=headers, 
-                data=data
-            )
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data['access_token']
-                
-                logger.info("✅ Client credentials authentication successful!")
-                logger.info(f"   Token expires in: {token_data.get('expires_in', 'unknown')} seconds")
-                return True
-            else:
-                logger.error(f"❌ Authentication failed: {response.status_code}")
-                logger.error(response.text)
-                return False
-                
-        except Exception as e:
-            logger.error(f"❌ Authentication error: {e}")
-            return False
-    
-    def authenticate_browser(self) -> bool:
-        """Perform OAuth authentication via browser (fallback method)"""
-        
-        auth_code = {}
-        
-        class OAuthHandler(BaseHTTPRequestHandler):
-            def do_GET(self):
-                parsed_url = urllib.parse.urlparse(self.path)
-                query = urllib.parse.parse_qs(parsed_url.query)
-                
-                if 'code' in query:
-                    auth_code['code'] = query['code'][0]
-                    message = "✅ Authentication successful! You can close this browser."
-                elif 'error' in query:
-                    auth_code['error'] = query['error'][0]
-                    message = f"❌ Authentication failed: {query['error'][0]}"
-                else:
-                    message = "❌ No authorization code found."
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                
-                html_response = f"""
-                <html><body style='font-family: Arial; text-align: center; padding: 50px;'>
-                <h2>{message}</h2>
-                <p>Return to your application.</p>
-                </body></html>
-                """
-                self.wfile.write(html_response.encode('utf-8'))
-            
-            def log_message(self, format, *args):
-                pass  # Suppress server logs
-        
-        def start_server():
-            httpd = HTTPServer(('localhost', 3001), OAuthHandler)
-            httpd.handle_request()
-        
-        # Start local server
-        logger.info("🔄 Starting local OAuth server...")
-        server_thread = threading.Thread(target=start_server, daemon=True)
-        server_thread.start()
-        time.sleep(1)
-        
-        # Build authorization URL
-        redirect_uri = 'http://localhost:3001/callback'
-        params = {
-            'response_type': 'code',
-            'client_id': self.client_id,
-            'redirect_uri': redirect_uri,
-            'scope': 'data:read account:read'
-        }
-        
-        auth_url = f"https://developer.api.autodesk.com/authentication/v2/authorize?{urllib.parse.urlencode(params)}"
-        
-        logger.info("🔗 Opening browser for Autodesk authentication...")
-        webbrowser.open(auth_url)
-        
-        # Wait for authorization code
-        timeout = 120  # 2 minutes
-        start_time = time.time()
-        
-        while 'code' not in auth_code and 'error' not in auth_code:
-            if time.time() - start_time > timeout:
-                logger.error("⏰ Authentication timeout!")
-                return False
-            time.sleep(1)
-        
-        if 'error' in auth_code:
-            logger.error(f"❌ Authentication error: {auth_code['error']}")
-            return False
-        
-        # Exchange code for tokens
-        logger.info("🔐 Exchanging code for access token...")
-        return self.exchange_code_for_token(auth_code['code'], redirect_uri)
-    
-    def exchange_code_for_token(self, code: str, redirect_uri: str) -> bool:
-        """Exchange authorization code for access token"""
-        
-        auth_string = f"{self.client_id}:{self.client_secret}"
-        auth_header = base64.b64encode(auth_string.encode()).decode()
-        
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Authorization': f'Basic {auth_header}'
-        }
-        
-        data = {
-            'grant_type': 'authorization_code',
-            'code': code,
-            'redirect_uri': redirect_uri
-        }
-        
-        try:
-            response = requests.post(
-                'https://developer.api.autodesk.com/authentication/v2/token',
-                headers=headers, 
-                data=data
-            )
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data['access_token']
-                self.refresh_token = token_data.get('refresh_token')
-                
-                logger.info("✅ Authentication successful!")
-                return True
-            else:
-                logger.error(f"❌ Token exchange failed: {response.status_code}")
-                logger.error(response.text)
-                return False
-                
-        except Exception as e:
-            logger.error(f"❌ Token exchange error: {e}")
-            return False
-
-
-class AutodeskFormsClient:
-    """Client for fetching forms/reports from Autodesk Construction Cloud"""
-    
-    def __init__(self, access_token: str):
-        self.access_token = access_token
-        self.base_url = "https://developer.api.autodesk.com/construction/forms/v1"
-    
-    def get_form_templates(self, project_id: str) -> List[Dict[str, Any]]:
-        """Get all form templates for a project"""
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
-        url = f"{self.base_url}/projects/{project_id}/form-templates"
-        
-        logger.info(f"📋 Fetching form templates from project {project_id[:8]}...")
-        
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            
-            response_data = response.json()
-            
-            # Handle different possible response formats
-            if isinstance(response_data, list):
-                templates = response_data
-            elif isinstance(response_data, dict):
-                templates = response_data.get('results', response_data.get('data', [response_data]))
-                if not isinstance(templates, list):
-                    templates = [templates] if templates else []
-            else:
-                logger.warning(f"Unexpected response format: {type(response_data)}")
-                return []
-            
-            logger.info(f"✅ Found {len(templates)} form templates")
-            return templates if isinstance(templates, list) else []
-            
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP Error fetching templates: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"Error fetching templates: {e}")
-            return []
-    
-    def get_forms_for_template(self, project_id: str, template_id: str, template_name: str = "Unknown") -> List[Dict[str, Any]]:
-        """Get all forms for a specific template"""
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
-        url = f"{self.base_url}/projects/{project_id}/form-templates/{template_id}/forms"
-        
-        logger.info(f"📝 Fetching forms for template: {template_name}")
-        
-        all_forms = []
-        limit = 200  # Max allowed by API
-        offset = 0
-        
-        while True:
-            params = {
-                'limit': limit,
-                'offset': offset
-            }
-            
-            try:
-                response = requests.get(url, headers=headers, params=params)
-                
-                # Handle 404 specifically
-                if response.status_code == 404:
-                    logger.info(f"No forms found for template {template_name} (404)")
-                    break
-                
-                response.raise_for_status()
-                
-                response_data = response.json()
-                
-                # Handle different response formats
-                if isinstance(response_data, list):
-                    forms = response_data
-                elif isinstance(response_data, dict):
-                    forms = response_data.get('results', response_data.get('data', []))
-                    if not isinstance(forms, list):
-                        forms = [response_data] if response_data else []
-                else:
-                    logger.warning(f"Unexpected forms response format: {type(response_data)}")
-                    break
-                
-                if not forms:
-                    break
-                
-                all_forms.extend(forms)
-                logger.info(f"Fetched {len(forms)} forms (total: {len(all_forms)})")
-                
-                # Check if we got fewer results than requested (indicates last page)
-                if len(forms) < limit:
-                    break
-                
-                offset += limit
-                
-            except requests.exceptions.HTTPError as e:
-                logger.error(f"HTTP Error fetching forms: {e}")
-                break
-            except Exception as e:
-                logger.error(f"Error fetching forms: {e}")
-                break
-        
-        logger.info(f"Total forms for {template_name}: {len(all_forms)}")
-        return all_forms
-    
-    def try_alternative_forms_endpoint(self, project_id: str) -> List[Dict[str, Any]]:
-        """Try alternative endpoint to get all forms directly"""
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
-        url = f"{self.base_url}/projects/{project_id}/forms"
-        
-        logger.info("🔄 Trying alternative forms endpoint...")
-        
-        try:
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 404:
-                logger.info("Alternative endpoint not available (404)")
-                return []
-            
-            response.raise_for_status()
-            
-            response_data = response.json()
-            
-            # Handle different response formats
-            if isinstance(response_data, list):
-                forms = response_data
-            elif isinstance(response_data, dict):
-                forms = response_data.get('results', response_data.get('data', []))
-                if not isinstance(forms, list):
-                    forms = [response_data] if response_data else []
-            else:
-                logger.warning(f"Unexpected response format: {type(response_data)}")
-                return []
-            
-            logger.info(f"✅ Found {len(forms)} forms via alternative endpoint")
-            return forms
-            
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP Error on alternative endpoint: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"Error on alternative endpoint: {e}")
-            return []
-    
-    def get_all_forms(self, project_id: str) -> List[Dict[str, Any]]:
-        """Get all forms from all templates in a project"""
-        
-        logger.info(f"🔍 Getting all forms from project {project_id[:8]}...")
-        
-        # First get all templates
-        templates = self.get_form_templates(project_id)
-        
-        if not templates:
-            logger.warning("No form templates found")
-            return []
-        
-        all_forms = []
-        
-        # Method 1: Get forms for each template individually
-        for template in templates:
-            if not isinstance(template, dict):
-                continue
-            
-            template_id = template.get('id')
-            template_name = template.get('name', 'Unnamed Template')
-            
-            if not template_id:
-                continue
-            
-            try:
-                forms = self.get_forms_for_template(project_id, template_id, template_name)
-                
-                # Add template info to each form
-                for form in forms:
-                    if isinstance(form, dict):
-                        form['template_name'] = template_name
-                        form['template_type'] = template.get('templateType', 'unknown')
-                        form['template_id'] = template_id
-                
-                all_forms.extend(forms)
-                
-            except Exception as e:
-                logger.error(f"Error processing template {template_name}: {e}")
-                continue
-        
-        # Method 2: If no forms found, try alternative endpoint
-        if not all_forms:
-            alternative_forms = self.try_alternative_forms_endpoint(project_id)
-            
-            # Add basic template info if we got forms from alternative endpoint
-            for form in alternative_forms:
-                if isinstance(form, dict):
-                    form_template_id = form.get('formTemplate', {}).get('id') if isinstance(form.get('formTemplate'), dict) else None
-                    
-                    # Find matching template
-                    template_info = None
-                    for template in templates:
-                        if isinstance(template, dict) and template.get('id') == form_template_id:
-                            template_info = template
-                            break
-                    
-                    if template_info:
-                        form['template_name'] = template_info.get('name', 'Unknown Template')
-                        form['template_type'] = template_info.get('templateType', 'unknown')
-                        form['template_id'] = template_info.get('id')
-                    else:
-                        form['template_name'] = 'Unknown Template'
-                        form['template_type'] = 'unknown'
-                        form['template_id'] = form_template_id
-            
-            all_forms.extend(alternative_forms)
-        
-        logger.info(f"📊 Total forms across all templates: {len(all_forms)}")
-        return all_forms
-
-
-class FormsCSVExporter:
-    """Export forms data to CSV format"""
-    
-    def __init__(self, output_dir: str = "."):
-        self.output_dir = output_dir
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+Autodesk Construction Cloud Forms Client
+Contains classes for authenticating and fetching forms data
+"""
+
+import requests
+import json
+import os
+import time
+import threading
+import webbrowser
+import urllib.parse
+import csv
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Any
+from datetime import datetime
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Suppress SSL warnings
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+# Static form body for the client-credentials grant
+_CLIENT_CREDENTIALS_DATA = {
+    'grant_type': 'client_credentials',
+    'scope': 'data:read account:read'
+}
+
+
+class _PushbackStream:
+    """File-like that replays a sniffed byte before the underlying stream"""
+
+    def __init__(self, head: bytes, raw):
+        self._head = head
+        self._raw = raw
+
+    def read(self, size=-1):
+        if self._head:
+            head, self._head = self._head, b''
+            return head
+        return self._raw.read(size)
+
+
+def _parse_json(response):
+    """Decode a JSON response body, using orjson when available"""
+
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def create_session() -> requests.Session:
+    """Create a requests Session with keep-alive pooling and retries
+
+    Everything talks HTTP/1.1 to the one Autodesk host, so concurrent
+    fetches each need their own pooled socket: pool_maxsize matches the
+    worst-case fan-out (10 template workers x 5 speculative pages).
+    """
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=50,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.5,
+            respect_retry_after_header=True,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET', 'POST']
+        )
+    )
+    session.mount('https://', adapter)
+
+    # Ask for compressed bodies; forms JSON shrinks 5-10x under gzip.
+    # Only advertise brotli when we can actually decode it.
+    try:
+        import brotli  # noqa: F401
+        session.headers['Accept-Encoding'] = 'gzip, deflate, br'
+    except ImportError:
+        session.headers['Accept-Encoding'] = 'gzip, deflate'
+
+    return session
+
+
+class AutodeskAuthenticator:
+    """Handles Autodesk OAuth authentication"""
+    
+    def __init__(self, client_id: str, client_secret: str):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.access_token = None
+        self.refresh_token = None
+        self.session = create_session()
+        self._basic_auth = requests.auth.HTTPBasicAuth(client_id, client_secret)
+        self._token_url = "https://developer.api.autodesk.com/authentication/v2/token"
+        self._token_expiry = 0.0
+        self._token_lock = threading.Lock()
+        self._token_cache_path = os.getenv('ACC_TOKEN_CACHE', '.acc_token_cache.json')
+
+    def authenticate(self) -> bool:
+        """Perform OAuth authentication"""
+
+        # A token persisted by a previous process saves a full round-trip
+        # to the token endpoint on every restart
+        if self._load_cached_token():
+            logger.info("✅ Reusing cached access token")
+            return True
+
+        # For web deployment, we'll use client credentials flow
+        # This requires your Autodesk app to be configured for server-to-server auth
+        return self.authenticate_client_credentials()
+
+    def _load_cached_token(self) -> bool:
+        """Load a non-expired token persisted by a previous process"""
+
+        try:
+            with open(self._token_cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if cached.get('client_id') != self.client_id:
+            return False
+
+        remaining = cached.get('expires_at', 0) - time.time()
+        if remaining <= 0 or not cached.get('access_token'):
+            return False
+
+        self.access_token = cached['access_token']
+        self._token_expiry = time.monotonic() + remaining
+        return True
+
+    def _save_cached_token(self, expires_in: int):
+        """Persist the current token so restarts can skip re-auth"""
+
+        payload = json.dumps({
+            'client_id': self.client_id,
+            'access_token': self.access_token,
+            'expires_at': time.time() + expires_in - 60
+        })
+
+        try:
+            # Owner-only permissions; the file holds a live bearer token
+            fd = os.open(self._token_cache_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+        except OSError as e:
+            logger.warning(f"Could not persist token cache: {e}")
+
+    def get_access_token(self):
+        """Return the cached access token, re-authenticating near expiry"""
+
+        with self._token_lock:
+            if self.access_token and time.monotonic() < self._token_expiry:
+                return self.access_token
+
+            if self.authenticate():
+                return self.access_token
+
+            return None
+
+    def authenticate_client_credentials(self) -> bool:
+        """Authenticate using client credentials flow (for server-to-server)"""
+
+        try:
+            response = self.session.post(
+                self._token_url,
+                auth=self._basic_auth,
+                data=_CLIENT_CREDENTIALS_DATA
+            )
+            
+            if response.status_code == 200:
+                token_data = _parse_json(response)
+                self.access_token = token_data['access_token']
+
+                # Refresh 60s early so callers never hand out a stale token
+                expires_in = int(token_data.get('expires_in', 3600))
+                self._token_expiry = time.monotonic() + expires_in - 60
+                self._save_cached_token(expires_in)
+
+                logger.info("✅ Client credentials authentication successful!")
+                logger.info(f"   Token expires in: {token_data.get('expires_in', 'unknown')} seconds")
+                return True
+            else:
+                logger.error(f"❌ Authentication failed: {response.status_code}")
+                logger.error(response.text)
+                return False
+                
+        except Exception as e:
+            logger.error(f"❌ Authentication error: {e}")
+            return False
+    
+    def authenticate_browser(self) -> bool:
+        """Perform OAuth authentication via browser (fallback method)"""
+        
+        auth_code = {}
+        server_ready = threading.Event()
+        callback_done = threading.Event()
+
+        class OAuthHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed_url = urllib.parse.urlparse(self.path)
+                query = urllib.parse.parse_qs(parsed_url.query)
+                
+                if 'code' in query:
+                    auth_code['code'] = query['code'][0]
+                    message = "✅ Authentication successful! You can close this browser."
+                elif 'error' in query:
+                    auth_code['error'] = query['error'][0]
+                    message = f"❌ Authentication failed: {query['error'][0]}"
+                else:
+                    message = "❌ No authorization code found."
+                
+                self.send_response(200)
+                self.send_header('Content-type', 'text/html')
+                self.end_headers()
+                
+                html_response = f"""
+                <html><body style='font-family: Arial; text-align: center; padding: 50px;'>
+                <h2>{message}</h2>
+                <p>Return to your application.</p>
+                </body></html>
+                """
+                self.wfile.write(html_response.encode('utf-8'))
+                callback_done.set()
+
+            def log_message(self, format, *args):
+                pass  # Suppress server logs
+        
+        def start_server():
+            httpd = HTTPServer(('localhost', 3001), OAuthHandler)
+            server_ready.set()
+            httpd.handle_request()
+
+        # Start local server
+        logger.info("🔄 Starting local OAuth server...")
+        server_thread = threading.Thread(target=start_server, daemon=True)
+        server_thread.start()
+        server_ready.wait(timeout=5)
+        
+        # Build authorization URL
+        redirect_uri = 'http://localhost:3001/callback'
+        params = {
+            'response_type': 'code',
+            'client_id': self.client_id,
+            'redirect_uri': redirect_uri,
+            'scope': 'data:read account:read'
+        }
+        
+        auth_url = f"https://developer.api.autodesk.com/authentication/v2/authorize?{urllib.parse.urlencode(params)}"
+        
+        logger.info("🔗 Opening browser for Autodesk authentication...")
+        webbrowser.open(auth_url)
+        
+        # Wait for the callback handler to signal us (2 minute timeout)
+        if not callback_done.wait(timeout=120):
+            logger.error("⏰ Authentication timeout!")
+            return False
+        
+        if 'error' in auth_code:
+            logger.error(f"❌ Authentication error: {auth_code['error']}")
+            return False
+
+        # A stray request (e.g. a favicon fetch) can trip the one-shot
+        # server without delivering a code
+        if 'code' not in auth_code:
+            logger.error("❌ No authorization code received!")
+            return False
+
+        # Exchange code for tokens
+        logger.info("🔐 Exchanging code for access token...")
+        return self.exchange_code_for_token(auth_code['code'], redirect_uri)
+    
+    def exchange_code_for_token(self, code: str, redirect_uri: str) -> bool:
+        """Exchange authorization code for access token"""
+        
+        data = {
+            'grant_type': 'authorization_code',
+            'code': code,
+            'redirect_uri': redirect_uri
+        }
+        
+        try:
+            response = self.session.post(
+                self._token_url,
+                auth=self._basic_auth,
+                data=data
+            )
+            
+            if response.status_code == 200:
+                token_data = _parse_json(response)
+                self.access_token = token_data['access_token']
+                self.refresh_token = token_data.get('refresh_token')
+                self._token_expiry = time.monotonic() + int(token_data.get('expires_in', 3600)) - 60
+
+                logger.info("✅ Authentication successful!")
+                return True
+            else:
+                logger.error(f"❌ Token exchange failed: {response.status_code}")
+                logger.error(response.text)
+                return False
+                
+        except Exception as e:
+            logger.error(f"❌ Token exchange error: {e}")
+            return False
+
+
+class AutodeskFormsClient:
+    """Client for fetching forms/reports from Autodesk Construction Cloud"""
+    
+    def __init__(self, access_token: str, max_workers: int = 10, session: requests.Session = None):
+        self.access_token = access_token
+        self.base_url = "https://developer.api.autodesk.com/construction/forms/v1"
+        self.max_workers = max_workers
+        # Callers may inject a shared session so successive clients keep
+        # reusing the same warm connection pool
+        self.session = session if session is not None else create_session()
+        self._template_cache = {}  # project_id -> (fetched_at, templates)
+        self._template_cache_ttl = 300  # templates change on the hour scale
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json"
+        })
+    
+    @staticmethod
+    def _as_list(data, wrap_dict=False):
+        """Normalize the API's list/dict response shapes into a list
+
+        wrap_dict controls what a dict without results/data becomes: the
+        templates endpoint historically treated it as a single bare
+        object, while the forms endpoints treat it as an empty page so
+        pagination terminates instead of appending the envelope itself.
+        """
+
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            items = data.get('results', data.get('data'))
+            if isinstance(items, list):
+                return items
+            if items is not None:
+                return [items]
+            return [data] if wrap_dict and data else []
+        logger.warning(f"Unexpected response format: {type(data)}")
+        return []
+
+    def get_form_templates(self, project_id: str) -> List[Dict[str, Any]]:
+        """Get all form templates for a project (cached for a few minutes)"""
+
+        cached = self._template_cache.get(project_id)
+        if cached is not None and time.monotonic() - cached[0] < self._template_cache_ttl:
+            logger.info(f"📋 Using cached form templates for project {project_id[:8]}...")
+            return cached[1]
+
+        url = f"{self.base_url}/projects/{project_id}/form-templates"
+
+        logger.info(f"📋 Fetching form templates from project {project_id[:8]}...")
+
+        try:
+            response = self.session.get(url)
+            response.raise_for_status()
+            
+            templates = self._as_list(_parse_json(response), wrap_dict=True)
+
+            logger.info(f"✅ Found {len(templates)} form templates")
+
+            self._template_cache[project_id] = (time.monotonic(), templates)
+            return templates
+
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"HTTP Error fetching templates: {e}")
+            # A 401 means the token died; drop any stale cache entry too
+            if e.response is not None and e.response.status_code == 401:
+                self._template_cache.pop(project_id, None)
+            return []
+        except Exception as e:
+            logger.error(f"Error fetching templates: {e}")
+            return []
+    
+    def get_forms_for_template(self, project_id: str, template_id: str, template_name: str = "Unknown") -> List[Dict[str, Any]]:
+        """Get all forms for a specific template"""
+        
+        url = f"{self.base_url}/projects/{project_id}/form-templates/{template_id}/forms"
+        
+        logger.info(f"📝 Fetching forms for template: {template_name}")
+
+        limit = 200  # Max allowed by API
+        batch_size = 5  # Speculative pages fetched in parallel per batch
+
+        def fetch_page(offset):
+            """Fetch one page of forms; returns None when paging should stop"""
+
+            params = {
+                'limit': limit,
+                'offset': offset
+            }
+
+            try:
+                response = self.session.get(url, params=params)
+
+                # Handle 404 specifically
+                if response.status_code == 404:
+                    logger.info(f"No forms found for template {template_name} (404)")
+                    return None
+
+                response.raise_for_status()
+
+                return self._as_list(_parse_json(response))
+
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"HTTP Error fetching forms: {e}")
+                return None
+            except Exception as e:
+                logger.error(f"Error fetching forms: {e}")
+                return None
+
+        all_forms = []
+        offset = 0
+        done = False
+
+        # Page offsets are independent GETs, so speculatively fetch a window
+        # of them in parallel and stop as soon as a short, empty or failed
+        # page shows up -- a few wasted requests buy a batch-wide latency win
+        with ThreadPoolExecutor(max_workers=batch_size) as executor:
+            while not done:
+                offsets = [offset + i * limit for i in range(batch_size)]
+
+                for forms in executor.map(fetch_page, offsets):
+                    if not forms:
+                        done = True
+                        break
+
+                    all_forms.extend(forms)
+                    logger.info(f"Fetched {len(forms)} forms (total: {len(all_forms)})")
+
+                    # Fewer results than requested indicates the last page
+                    if len(forms) < limit:
+                        done = True
+                        break
+
+                offset += batch_size * limit
+
+        logger.info(f"Total forms for {template_name}: {len(all_forms)}")
+        return all_forms
+    
+    def try_alternative_forms_endpoint(self, project_id: str) -> List[Dict[str, Any]]:
+        """Try alternative endpoint to get all forms directly"""
+        
+        url = f"{self.base_url}/projects/{project_id}/forms"
+        
+        logger.info("🔄 Trying alternative forms endpoint...")
+
+        try:
+            response = self.session.get(url, stream=(ijson is not None))
+
+            if response.status_code == 404:
+                logger.info("Alternative endpoint not available (404)")
+                return []
+
+            response.raise_for_status()
+
+            if ijson is not None:
+                # This endpoint can return every form in one payload, so
+                # parse incrementally off the socket instead of holding the
+                # whole document in memory. Sniff the first byte to tell a
+                # bare JSON array from the usual {"results": [...]} envelope.
+                raw = response.raw
+                raw.decode_content = True
+
+                head = raw.read(1)
+                while head.isspace():
+                    head = raw.read(1)
+
+                prefix = 'item' if head == b'[' else 'results.item'
+                forms = list(ijson.items(_PushbackStream(head, raw), prefix))
+            else:
+                forms = self._as_list(_parse_json(response))
+
+            logger.info(f"✅ Found {len(forms)} forms via alternative endpoint")
+            return forms
+            
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"HTTP Error on alternative endpoint: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Error on alternative endpoint: {e}")
+            return []
+    
+    def _fetch_template_forms(self, project_id: str, template: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fetch one template's forms with its metadata attached"""
+
+        template_id = template.get('id')
+        template_name = template.get('name', 'Unnamed Template')
+        tmpl_meta = {
+            'template_name': template_name,
+            'template_type': template.get('templateType', 'unknown'),
+            'template_id': template_id
+        }
+
+        try:
+            forms = self.get_forms_for_template(project_id, template_id, template_name)
+
+            # Filter malformed entries once, then batch-attach template info
+            forms = [f for f in forms if isinstance(f, dict)]
+            for form in forms:
+                form.update(tmpl_meta)
+
+            return forms
+
+        except Exception as e:
+            logger.error(f"Error processing template {template_name}: {e}")
+            return []
+
+    def _fetch_alternative_forms(self, project_id: str, valid_templates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fallback: fetch forms directly and attach template metadata"""
+
+        alternative_forms = self.try_alternative_forms_endpoint(project_id)
+
+        # Index templates by id once instead of scanning per form
+        tpl_by_id = {t['id']: t for t in valid_templates}
+
+        # Add basic template info if we got forms from alternative endpoint
+        for form in alternative_forms:
+            if isinstance(form, dict):
+                form_template_id = form.get('formTemplate', {}).get('id') if isinstance(form.get('formTemplate'), dict) else None
+
+                # Find matching template
+                template_info = tpl_by_id.get(form_template_id)
+
+                if template_info:
+                    form['template_name'] = template_info.get('name', 'Unknown Template')
+                    form['template_type'] = template_info.get('templateType', 'unknown')
+                    form['template_id'] = template_info.get('id')
+                else:
+                    form['template_name'] = 'Unknown Template'
+                    form['template_type'] = 'unknown'
+                    form['template_id'] = form_template_id
+
+        return alternative_forms
+
+    def iter_all_forms(self, project_id: str):
+        """Yield batches of forms as each template's fetch completes
+
+        Produces the same data as get_all_forms, but lets callers report
+        progress and process early batches while later templates are
+        still downloading.
+        """
+
+        logger.info(f"🔍 Getting all forms from project {project_id[:8]}...")
+
+        # First get all templates
+        templates = self.get_form_templates(project_id)
+
+        if not templates:
+            logger.warning("No form templates found")
+            return
+
+        valid_templates = [t for t in templates if isinstance(t, dict) and t.get('id')]
+
+        got_any = False
+
+        # Method 1: Get forms for each template, fanning out across a thread
+        # pool since the per-template fetches are independent network calls
+        if valid_templates:
+            workers = min(self.max_workers, len(valid_templates))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(self._fetch_template_forms, project_id, t)
+                    for t in valid_templates
+                ]
+                for future in as_completed(futures):
+                    forms = future.result()
+                    if forms:
+                        got_any = True
+                        yield forms
+
+        # Method 2: If no forms found, try alternative endpoint
+        if not got_any:
+            yield self._fetch_alternative_forms(project_id, valid_templates)
+
+    def get_all_forms(self, project_id: str) -> List[Dict[str, Any]]:
+        """Get all forms from all templates in a project"""
+
+        all_forms = []
+        for batch in self.iter_all_forms(project_id):
+            all_forms.extend(batch)
+
+        logger.info(f"📊 Total forms across all templates: {len(all_forms)}")
+        return all_forms
+
+
+class FormsCSVExporter:
+    """Export forms data to CSV format"""
+
+    # Column order for exported rows; extra keys on a form are ignored
+    FIELDNAMES = [
+        'id', 'formNum', 'name', 'status', 'formDate',
+        'template_name', 'template_type', 'template_id',
+        'createdAt', 'updatedAt', 'createdBy',
+        'assigneeId', 'assigneeType', 'locationId'
+    ]
+
+    def __init__(self, output_dir: str = "."):
+        self.output_dir = output_dir
+
+    def export(self, forms_iter, filename: str = None) -> str:
+        """Stream forms to a CSV file and return its path
+
+        Accepts any iterable of form dicts (a generator works fine), so
+        rows are written as they arrive and peak memory stays flat no
+        matter how many forms the project holds.
+        """
+
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"ACC_Forms_Export_{timestamp}.csv"
+
+        path = os.path.join(self.output_dir, filename)
+
+        with open(path, 'w', newline='', buffering=1 << 20, encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.FIELDNAMES, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(forms_iter)
+
+        logger.info(f"📄 Exported forms to {path}")
+        return path
\ No newline at end of file
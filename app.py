@@ -1,442 +1,826 @@
-#!/usr/bin/env python3
-"""
-ACC Forms Dashboard - Flask Web App
-Fetches ACC Forms data and displays in a web dashboard
-"""
-
-import os
-import json
-import sys
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file, session
-import requests
-import base64
-import urllib3
-from dotenv import load_dotenv
-import logging
-import io
-import threading
-import time
-import webbrowser
-import urllib.parse
-from http.server import HTTPServer, BaseHTTPRequestHandler
-
-# Import our ACC Forms classes
-from acc_forms_client import AutodeskAuthenticator, AutodeskFormsClient, FormsCSVExporter
-
-# Load environment variables
-load_dotenv()
-
-# Suppress SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# Initialize Flask app
-app = Flask(__name__)
-app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
-
-# Configure sessions for OAuth state
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['PERMANENT_SESSION_LIFETIME'] = 1800  # 30 minutes
-
-# Global variables for storing data
-forms_data = []
-last_update = None
-is_loading = False
-error_message = None
-authenticator = None  # Store authenticator globally
-
-@app.route('/')
-def dashboard():
-    """Main dashboard page"""
-    global forms_data, last_update, is_loading, error_message
-    
-    try:
-        return render_template('dashboard.html', 
-                             forms_count=len(forms_data),
-                             last_update=last_update,
-                             is_loading=is_loading,
-                             error_message=error_message)
-    except Exception as e:
-        return f"Template Error: {str(e)}. Make sure dashboard.html is in templates/ folder."
-
-@app.route('/health')
-def health_check():
-    """Health check endpoint"""
-    return {
-        'status': 'ok',
-        'message': 'Flask app is running',
-        'python_version': sys.version,
-        'templates_folder': os.path.exists('templates'),
-        'dashboard_template': os.path.exists('templates/dashboard.html')
-    }
-
-@app.route('/auth/start')
-def start_auth():
-    """Start Autodesk OAuth authentication"""
-    global authenticator
-    
-    try:
-        # Get configuration from environment
-        client_id = os.getenv('AUTODESK_CLIENT_ID')
-        client_secret = os.getenv('AUTODESK_CLIENT_SECRET')
-        
-        if not all([client_id, client_secret]):
-            return jsonify({'status': 'error', 'message': 'Missing Autodesk credentials'})
-        
-        authenticator = AutodeskAuthenticator(client_id, client_secret)
-        
-        # Build authorization URL
-        redirect_uri = request.url_root + 'auth/callback'
-        params = {
-            'response_type': 'code',
-            'client_id': client_id,
-            'redirect_uri': redirect_uri,
-            'scope': 'data:read account:read'
-        }
-        
-        auth_url = f"https://developer.api.autodesk.com/authentication/v2/authorize?{urllib.parse.urlencode(params)}"
-        
-        # Store redirect URI in session for callback
-        session['redirect_uri'] = redirect_uri
-        
-        return jsonify({'status': 'success', 'auth_url': auth_url})
-        
-    except Exception as e:
-        logger.error(f"Error starting auth: {e}")
-        return jsonify({'status': 'error', 'message': str(e)})
-
-@app.route('/auth/callback')
-def auth_callback():
-    """Handle OAuth callback from Autodesk"""
-    global authenticator, is_loading
-    
-    try:
-        code = request.args.get('code')
-        error = request.args.get('error')
-        
-        if error:
-            error_message = f"Authentication failed: {error}"
-            return f"""
-            <html><body style='font-family: Arial; text-align: center; padding: 50px;'>
-            <h2>❌ Authentication Failed</h2>
-            <p>{error_message}</p>
-            <p><a href="/">Return to Dashboard</a></p>
-            </body></html>
-            """
-        
-        if not code:
-            return f"""
-            <html><body style='font-family: Arial; text-align: center; padding: 50px;'>
-            <h2>❌ No Authorization Code</h2>
-            <p><a href="/">Return to Dashboard</a></p>
-            </body></html>
-            """
-        
-        # Exchange code for token
-        redirect_uri = session.get('redirect_uri', request.url_root + 'auth/callback')
-        
-        if authenticator and authenticator.exchange_code_for_token(code, redirect_uri):
-            # Authentication successful - start loading data in background
-            is_loading = True
-            threading.Thread(target=load_forms_data_background, daemon=True).start()
-            
-            return f"""
-            <html><body style='font-family: Arial; text-align: center; padding: 50px;'>
-            <h2>✅ Authentication Successful!</h2>
-            <p>Loading your ACC Forms data...</p>
-            <p><a href="/">Return to Dashboard</a></p>
-            <script>
-                setTimeout(function() {{
-                    window.close();
-                    if (window.opener) {{
-                        window.opener.location.reload();
-                    }}
-                }}, 3000);
-            </script>
-            </body></html>
-            """
-        else:
-            return f"""
-            <html><body style='font-family: Arial; text-align: center; padding: 50px;'>
-            <h2>❌ Token Exchange Failed</h2>
-            <p>Could not complete authentication.</p>
-            <p><a href="/">Return to Dashboard</a></p>
-            </body></html>
-            """
-        
-    except Exception as e:
-        logger.error(f"Callback error: {e}")
-        return f"""
-        <html><body style='font-family: Arial; text-align: center; padding: 50px;'>
-        <h2>❌ Authentication Error</h2>
-        <p>{str(e)}</p>
-        <p><a href="/">Return to Dashboard</a></p>
-        </body></html>
-        """
-
-def load_forms_data_background():
-    """Load forms data in background thread"""
-    global forms_data, last_update, is_loading, error_message, authenticator
-    
-    try:
-        if not authenticator or not authenticator.access_token:
-            error_message = "No valid authentication token"
-            is_loading = False
-            return
-        
-        # Get project ID
-        project_ids = os.getenv('AUTODESK_PROJECT_IDS', '').split(',')
-        if not project_ids[0]:
-            error_message = "No project ID configured"
-            is_loading = False
-            return
-        
-        project_id = project_ids[0].strip()
-        
-        # Fetch forms data
-        logger.info("Fetching forms data in background...")
-        forms_client = AutodeskFormsClient(authenticator.access_token)
-        forms = forms_client.get_all_forms(project_id)
-        
-        if forms:
-            forms_data = forms
-            last_update = datetime.now()
-            error_message = None
-            logger.info(f"Successfully loaded {len(forms)} forms")
-        else:
-            forms_data = []
-            error_message = "No forms found in project"
-        
-        is_loading = False
-        
-    except Exception as e:
-        logger.error(f"Error loading forms data: {e}")
-        error_message = str(e)
-        is_loading = False
-
-@app.route('/api/load-data', methods=['POST'])
-def load_data():
-    """API endpoint to start authentication and load ACC Forms data"""
-    global forms_data, last_update, is_loading, error_message
-    
-    if is_loading:
-        return jsonify({'status': 'error', 'message': 'Data is already being loaded'})
-    
-    try:
-        # Get configuration from environment
-        client_id = os.getenv('AUTODESK_CLIENT_ID')
-        client_secret = os.getenv('AUTODESK_CLIENT_SECRET')
-        project_ids = os.getenv('AUTODESK_PROJECT_IDS', '').split(',')
-        
-        if not all([client_id, client_secret, project_ids[0]]):
-            return jsonify({'status': 'error', 'message': 'Missing required environment variables'})
-        
-        # Start authentication process
-        return jsonify({
-            'status': 'auth_required',
-            'message': 'Authentication required. Please click the authentication link.',
-            'auth_url': '/auth/start'
-        })
-        
-    except Exception as e:
-        logger.error(f"Error in load_data: {e}")
-        return jsonify({'status': 'error', 'message': str(e)})
-
-@app.route('/api/forms-data')
-def get_forms_data():
-    """API endpoint to get forms data as JSON"""
-    global forms_data
-    
-    if not forms_data:
-        return jsonify({'status': 'error', 'message': 'No data loaded'})
-    
-    # Convert forms data to a more frontend-friendly format
-    processed_data = []
-    
-    for form in forms_data:
-        # Extract key information
-        form_info = {
-            'id': form.get('id'),
-            'formNum': form.get('formNum'),
-            'name': form.get('name'),
-            'status': form.get('status'),
-            'formDate': form.get('formDate'),
-            'templateName': form.get('template_name'),
-            'templateType': form.get('template_type'),
-            'createdAt': form.get('createdAt'),
-            'updatedAt': form.get('updatedAt'),
-            'assigneeId': form.get('assigneeId'),
-            'locationId': form.get('locationId'),
-            'customFieldsCount': len(form.get('customValues', [])),
-            'tabularDataCount': len(form.get('tabularValues', {})),
-            'hasNotes': bool(form.get('notes', '').strip()),
-            'hasDescription': bool(form.get('description', '').strip())
-        }
-        
-        # Add custom fields summary
-        custom_values = form.get('customValues', [])
-        custom_fields = {}
-        for field in custom_values:
-            if isinstance(field, dict):
-                field_name = field.get('itemLabel', field.get('name', ''))
-                field_value = field.get('textVal', field.get('numberVal', field.get('dateVal', '')))
-                if field_name:
-                    custom_fields[field_name] = field_value
-        
-        form_info['customFields'] = custom_fields
-        
-        # Add tabular data summary
-        tabular_values = form.get('tabularValues', {})
-        tabular_summary = {}
-        for table_name, table_data in tabular_values.items():
-            if isinstance(table_data, list):
-                tabular_summary[table_name] = {
-                    'rowCount': len(table_data),
-                    'columns': list(table_data[0].keys()) if table_data and isinstance(table_data[0], dict) else []
-                }
-        
-        form_info['tabularData'] = tabular_summary
-        processed_data.append(form_info)
-    
-    return jsonify({'status': 'success', 'data': processed_data})
-
-@app.route('/api/export-csv')
-def export_csv():
-    """Export forms data as CSV file"""
-    global forms_data
-    
-    if not forms_data:
-        return jsonify({'status': 'error', 'message': 'No data to export'})
-    
-    try:
-        # Create CSV exporter
-        exporter = FormsCSVExporter()
-        
-        # Generate CSV data in memory
-        output = io.StringIO()
-        
-        # Create detailed CSV data
-        fieldnames = [
-            'form_id', 'form_number', 'form_name', 'template_name',
-            'field_type', 'field_name', 'field_value', 'field_id',
-            'field_section', 'field_data_type', 'field_required',
-            'status', 'form_date', 'created_at', 'created_by',
-            'assignee_id', 'assignee_type', 'location_id'
-        ]
-        
-        import csv
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        
-        for form in forms_data:
-            form_base = {
-                'form_id': form.get('id'),
-                'form_number': form.get('formNum'),
-                'form_name': form.get('name'),
-                'template_name': form.get('template_name'),
-                'status': form.get('status'),
-                'form_date': form.get('formDate'),
-                'created_at': form.get('createdAt'),
-                'created_by': form.get('createdBy'),
-                'assignee_id': form.get('assigneeId'),
-                'assignee_type': form.get('assigneeType'),
-                'location_id': form.get('locationId')
-            }
-            
-            # Write custom values
-            custom_values = form.get('customValues', [])
-            if custom_values:
-                for field in custom_values:
-                    if isinstance(field, dict):
-                        field_value = ""
-                        value_name = field.get('valueName', 'textVal')
-                        
-                        if value_name and value_name in field:
-                            field_value = field.get(value_name)
-                        elif 'textVal' in field:
-                            field_value = field.get('textVal')
-                        elif 'value' in field:
-                            field_value = field.get('value')
-                        elif 'numberVal' in field:
-                            field_value = field.get('numberVal')
-                        elif 'dateVal' in field:
-                            field_value = field.get('dateVal')
-                        elif 'booleanVal' in field:
-                            field_value = field.get('booleanVal')
-                        
-                        row = form_base.copy()
-                        row.update({
-                            'field_type': 'custom',
-                            'field_name': field.get('itemLabel', field.get('name', '')),
-                            'field_value': str(field_value) if field_value is not None else '',
-                            'field_id': field.get('fieldId', field.get('id', '')),
-                            'field_section': field.get('sectionLabel', ''),
-                            'field_data_type': value_name if value_name else 'text',
-                            'field_required': field.get('required', False)
-                        })
-                        writer.writerow(row)
-            
-            # Write tabular values
-            tabular_values = form.get('tabularValues', {})
-            if tabular_values:
-                for table_name, table_data in tabular_values.items():
-                    if table_data and isinstance(table_data, list):
-                        for i, row_data in enumerate(table_data):
-                            if isinstance(row_data, dict):
-                                for field_name, field_value in row_data.items():
-                                    row = form_base.copy()
-                                    row.update({
-                                        'field_type': 'tabular',
-                                        'field_name': f"{table_name}.{field_name}",
-                                        'field_value': str(field_value) if field_value is not None else '',
-                                        'field_id': f"{table_name}_row_{i}_{field_name}",
-                                        'field_section': table_name,
-                                        'field_data_type': 'tabular_cell',
-                                        'field_required': False
-                                    })
-                                    writer.writerow(row)
-        
-        # Create response
-        output.seek(0)
-        csv_data = output.getvalue()
-        
-        # Create file-like object for download
-        csv_buffer = io.BytesIO()
-        csv_buffer.write(csv_data.encode('utf-8'))
-        csv_buffer.seek(0)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"ACC_Forms_Export_{timestamp}.csv"
-        
-        return send_file(
-            csv_buffer,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=filename
-        )
-        
-    except Exception as e:
-        logger.error(f"Error exporting CSV: {e}")
-        return jsonify({'status': 'error', 'message': str(e)})
-
-@app.route('/api/status')
-def get_status():
-    """Get current loading status"""
-    global forms_data, last_update, is_loading, error_message
-    
-    return jsonify({
-        'is_loading': is_loading,
-        'forms_count': len(forms_data),
-        'last_update': last_update.isoformat() if last_update else None,
-        'error_message': error_message
-    })
-
-if __name__ == '__main__':
-    port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('FLASK_ENV') == 'development'
-    
-    app.run(host='0.0.0.0', port=port, debug=debug)
+#!/usr/bin/env python3
+"""
+ACC Forms Dashboard - Flask Web App
+Fetches ACC Forms data and displays in a web dashboard
+"""
+
+# Monkey-patch before anything imports socket/ssl so blocking requests
+# calls yield to other greenlets during network waits
+try:
+    from gevent import monkey
+    monkey.patch_all()
+except ImportError:
+    monkey = None
+
+import os
+import json
+import sys
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Optional
+from flask import Flask, render_template, request, send_file, session, Response, stream_with_context
+from markupsafe import escape
+import requests
+import base64
+import urllib3
+from dotenv import load_dotenv
+import logging
+import io
+import csv
+import threading
+import queue
+import time
+import webbrowser
+import urllib.parse
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# Import our ACC Forms classes
+from acc_forms_client import AutodeskAuthenticator, AutodeskFormsClient, FormsCSVExporter, create_session
+
+# Load environment variables
+load_dotenv()
+
+# Suppress SSL warnings
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One pooled session shared by every forms client this process creates,
+# so reloads keep reusing warm keep-alive connections to Autodesk
+HTTP_SESSION = create_session()
+
+# On-disk cache of fetched forms so restarts within the TTL window can
+# skip the full re-download (the token has its own cache file). The
+# sqlite handle is opened lazily per process: under gunicorn --preload
+# a handle created at import would be fork-shared across workers.
+_cache = None
+FORMS_CACHE_TTL = 300  # seconds a cached copy is served without refetching
+
+
+def _get_cache():
+    global _cache
+    if diskcache is None:
+        return None
+    if _cache is None:
+        _cache = diskcache.Cache(os.getenv('ACC_CACHE_DIR', '.acc_cache'))
+    return _cache
+
+# Initialize Flask app
+app = Flask(__name__)
+app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
+
+# Configure sessions for OAuth state
+app.config['SESSION_TYPE'] = 'filesystem'
+app.config['PERMANENT_SESSION_LIFETIME'] = 1800  # 30 minutes
+
+# Gzip the big JSON/CSV responses; level 1 is nearly free CPU-wise but
+# still shrinks the repetitive payloads several-fold on the wire
+if Compress is not None:
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_LEVEL'] = 1
+    app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/csv']
+    Compress(app)
+
+@dataclass(frozen=True, slots=True)
+class DashboardState:
+    """Immutable snapshot of the dashboard's loaded data
+
+    Handlers read the module-level STATE once and work off that local
+    reference; writers build a fresh snapshot and swap it in with a single
+    assignment (atomic in CPython), so readers never see a torn update
+    where forms and last_update disagree.
+    """
+
+    forms: list = field(default_factory=list)
+    last_update: Optional[datetime] = None
+    loading: bool = False
+    error: Optional[str] = None
+
+
+STATE = DashboardState()
+
+authenticator = None  # Store authenticator globally
+
+def ojsonify(obj, status=200):
+    """Build a JSON response with orjson when available
+
+    orjson emits UTF-8 bytes directly and serializes datetime natively,
+    so callers can pass datetimes without pre-formatting them.
+    """
+
+    if orjson is not None:
+        body = orjson.dumps(obj)
+    else:
+        body = json.dumps(obj, default=str).encode()
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _json_response(body, etag):
+    """JSON response carrying a validator for If-None-Match revalidation"""
+    resp = Response(body, mimetype='application/json')
+    resp.headers['ETag'] = etag
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+# Candidate value keys for a custom field, in lookup priority order
+VALUE_KEYS = ('textVal', 'value', 'numberVal', 'dateVal', 'booleanVal')
+
+
+def _pick_value(field_dict):
+    """First non-None display value for a custom field
+
+    Chained dict.get defaults evaluate eagerly, so the old
+    get('textVal', get('numberVal', ...)) form always paid for every
+    lookup; this stops at the first hit instead.
+    """
+
+    get = field_dict.get
+    for key in ('textVal', 'numberVal', 'dateVal'):
+        value = get(key)
+        if value is not None:
+            return value
+    return ''
+
+# Detailed CSV layout: one row per custom field / tabular cell
+CSV_FIELDNAMES = [
+    'form_id', 'form_number', 'form_name', 'template_name',
+    'field_type', 'field_name', 'field_value', 'field_id',
+    'field_section', 'field_data_type', 'field_required',
+    'status', 'form_date', 'created_at', 'created_by',
+    'assignee_id', 'assignee_type', 'location_id'
+]
+
+# Rows per streamed export chunk; lower it on memory-tight hosts to cap
+# how much CSV can sit buffered ahead of a slow client
+CSV_CHUNK_ROWS = int(os.getenv('CSV_CHUNK_ROWS', '1000'))
+
+# Serialized /api/forms-data payload and pre-built CSV rows, produced in
+# one pass over the forms and reused until the snapshot changes
+_forms_json_cache = None
+_forms_json_cache_key = None
+_csv_rows_cache = None
+
+# Tabular column lists keyed by (template_name, table_name); every form
+# from the same template shares its table schemas
+_COL_CACHE = {}
+
+# Per-thread scratch buffers (greenlet-local under gevent's patching)
+_tls = threading.local()
+
+# OAuth callback pages, built once at import; dynamic text is escaped
+# before substitution since it can carry attacker-influenced values
+AUTH_FAIL_HTML = """
+<html><body style='font-family: Arial; text-align: center; padding: 50px;'>
+<h2>❌ Authentication Failed</h2>
+<p>{msg}</p>
+<p><a href="/">Return to Dashboard</a></p>
+</body></html>
+"""
+
+AUTH_NO_CODE_HTML = """
+<html><body style='font-family: Arial; text-align: center; padding: 50px;'>
+<h2>❌ No Authorization Code</h2>
+<p><a href="/">Return to Dashboard</a></p>
+</body></html>
+"""
+
+AUTH_SUCCESS_HTML = """
+<html><body style='font-family: Arial; text-align: center; padding: 50px;'>
+<h2>✅ Authentication Successful!</h2>
+<p>Loading your ACC Forms data...</p>
+<p><a href="/">Return to Dashboard</a></p>
+<script>
+    setTimeout(function() {
+        window.close();
+        if (window.opener) {
+            window.opener.location.reload();
+        }
+    }, 3000);
+</script>
+</body></html>
+"""
+
+TOKEN_FAIL_HTML = """
+<html><body style='font-family: Arial; text-align: center; padding: 50px;'>
+<h2>❌ Token Exchange Failed</h2>
+<p>Could not complete authentication.</p>
+<p><a href="/">Return to Dashboard</a></p>
+</body></html>
+"""
+
+AUTH_ERROR_HTML = """
+<html><body style='font-family: Arial; text-align: center; padding: 50px;'>
+<h2>❌ Authentication Error</h2>
+<p>{msg}</p>
+<p><a href="/">Return to Dashboard</a></p>
+</body></html>
+"""
+
+# Authorize URL with everything that never changes pre-encoded; only
+# redirect_uri (derived from the request host) is appended per call
+_AUTH_BASE = (
+    'https://developer.api.autodesk.com/authentication/v2/authorize'
+    '?response_type=code&scope=data%3Aread+account%3Aread&client_id='
+    + urllib.parse.quote(os.getenv('AUTODESK_CLIENT_ID', ''), safe='')
+)
+
+@app.route('/')
+def dashboard():
+    """Main dashboard page"""
+    state = _state_snapshot()
+
+    try:
+        return render_template('dashboard.html', 
+                             forms_count=len(state.forms),
+                             last_update=state.last_update,
+                             is_loading=state.loading,
+                             error_message=state.error)
+    except Exception as e:
+        return f"Template Error: {str(e)}. Make sure dashboard.html is in templates/ folder."
+
+@app.route('/health')
+def health_check():
+    """Health check endpoint"""
+    return {
+        'status': 'ok',
+        'message': 'Flask app is running',
+        'python_version': sys.version,
+        'templates_folder': os.path.exists('templates'),
+        'dashboard_template': os.path.exists('templates/dashboard.html')
+    }
+
+@app.route('/auth/start')
+def start_auth():
+    """Start Autodesk OAuth authentication"""
+    global authenticator
+    
+    try:
+        # Get configuration from environment
+        client_id = os.getenv('AUTODESK_CLIENT_ID')
+        client_secret = os.getenv('AUTODESK_CLIENT_SECRET')
+        
+        if not all([client_id, client_secret]):
+            return ojsonify({'status': 'error', 'message': 'Missing Autodesk credentials'})
+        
+        authenticator = AutodeskAuthenticator(client_id, client_secret)
+        
+        # Build authorization URL from the prebuilt base
+        redirect_uri = request.url_root + 'auth/callback'
+        auth_url = _AUTH_BASE + '&redirect_uri=' + urllib.parse.quote(redirect_uri, safe='')
+        
+        # Store redirect URI in session for callback
+        session['redirect_uri'] = redirect_uri
+        
+        return ojsonify({'status': 'success', 'auth_url': auth_url})
+        
+    except Exception as e:
+        logger.error(f"Error starting auth: {e}")
+        return ojsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/auth/callback')
+def auth_callback():
+    """Handle OAuth callback from Autodesk"""
+    global authenticator, STATE
+    
+    try:
+        code = request.args.get('code')
+        error = request.args.get('error')
+        
+        if error:
+            return AUTH_FAIL_HTML.format(msg=escape(f"Authentication failed: {error}"))
+
+        if not code:
+            return AUTH_NO_CODE_HTML
+        
+        # Exchange code for token
+        redirect_uri = session.get('redirect_uri', request.url_root + 'auth/callback')
+        
+        if authenticator and authenticator.exchange_code_for_token(code, redirect_uri):
+            # Authentication successful - start loading data in background
+            STATE = replace(STATE, loading=True)
+            _enqueue_fetch()
+
+            return AUTH_SUCCESS_HTML
+        else:
+            return TOKEN_FAIL_HTML
+
+    except Exception as e:
+        logger.error(f"Callback error: {e}")
+        return AUTH_ERROR_HTML.format(msg=escape(str(e)))
+
+def _normalize_forms(forms):
+    """Scrub malformed entries once so the hot loops can drop type guards
+
+    The API can hand back odd shapes (error strings inside lists, null
+    rows); filtering them here means _process_forms and the CSV row
+    builder iterate clean dicts and lists without per-item checks.
+    """
+
+    normalized = []
+    for form in forms:
+        if type(form) is not dict:
+            continue
+
+        custom_values = form.get('customValues')
+        form['customValues'] = (
+            [f for f in custom_values if type(f) is dict]
+            if type(custom_values) is list else []
+        )
+
+        tabular_values = form.get('tabularValues')
+        form['tabularValues'] = {
+            name: [r for r in rows if type(r) is dict]
+            for name, rows in tabular_values.items()
+            if type(rows) is list
+        } if type(tabular_values) is dict else {}
+
+        normalized.append(form)
+    return normalized
+
+
+def _csv_rows_for_form(form):
+    """Build the detailed CSV rows (CSV_FIELDNAMES order) for one form"""
+
+    rows = []
+    append = rows.append
+
+    # The static form columns surround the per-field columns in
+    # CSV_FIELDNAMES order, so precompute both slices once per form
+    base_head = [
+        form.get('id'),
+        form.get('formNum'),
+        form.get('name'),
+        form.get('template_name')
+    ]
+    base_tail = [
+        form.get('status'),
+        form.get('formDate'),
+        form.get('createdAt'),
+        form.get('createdBy'),
+        form.get('assigneeId'),
+        form.get('assigneeType'),
+        form.get('locationId')
+    ]
+
+    # Custom value rows (keys are guaranteed by _normalize_forms)
+    custom_values = form['customValues']
+    if custom_values:
+        for field_data in custom_values:
+            # Bind the method once; every column below hits it
+            field_get = field_data.get
+            value_name = field_get('valueName', 'textVal')
+            field_value = field_get(value_name) if value_name else None
+
+            # Fall back through the candidate keys, remembering
+            # which one actually held the value
+            if field_value is None:
+                for key in VALUE_KEYS:
+                    value = field_get(key)
+                    if value is not None:
+                        field_value = value
+                        value_name = key
+                        break
+
+            append(base_head + [
+                'custom',
+                field_get('itemLabel', field_get('name', '')),
+                str(field_value) if field_value is not None else '',
+                field_get('fieldId', field_get('id', '')),
+                field_get('sectionLabel', ''),
+                value_name if value_name else 'text',
+                field_get('required', False)
+            ] + base_tail)
+
+    # Tabular cell rows
+    tabular_values = form['tabularValues']
+    if tabular_values:
+        for table_name, table_data in tabular_values.items():
+            if table_data:
+                # Hoist the dotted/row-id prefixes out of the cell
+                # loop; they only vary per table and per row
+                t_prefix = table_name + '.'
+                t_id_prefix = table_name + '_row_'
+                for i, row_data in enumerate(table_data):
+                    id_prefix_i = f"{t_id_prefix}{i}_"
+                    for field_name, field_value in row_data.items():
+                        append(base_head + [
+                            'tabular',
+                            t_prefix + field_name,
+                            str(field_value) if field_value is not None else '',
+                            id_prefix_i + field_name,
+                            table_name,
+                            'tabular_cell',
+                            False
+                        ] + base_tail)
+
+    return rows
+
+
+def _process_forms(forms):
+    """One traversal of the forms producing both cached representations
+
+    Returns the serialized /api/forms-data payload and the pre-built CSV
+    rows together, so the form list is walked once per load instead of
+    once per endpoint per request.
+    """
+
+    processed_data = []
+    csv_rows = []
+
+    for form in forms:
+        # Both keys exist on every normalized form; binding them here
+        # avoids building throwaway default collections per lookup
+        custom_values = form['customValues']
+        tabular_values = form['tabularValues']
+
+        # Extract key information
+        form_info = {
+            'id': form.get('id'),
+            'formNum': form.get('formNum'),
+            'name': form.get('name'),
+            'status': form.get('status'),
+            'formDate': form.get('formDate'),
+            'templateName': form.get('template_name'),
+            'templateType': form.get('template_type'),
+            'createdAt': form.get('createdAt'),
+            'updatedAt': form.get('updatedAt'),
+            'assigneeId': form.get('assigneeId'),
+            'locationId': form.get('locationId'),
+            'customFieldsCount': len(custom_values),
+            'tabularDataCount': len(tabular_values),
+            'hasNotes': bool(form.get('notes', '').strip()),
+            'hasDescription': bool(form.get('description', '').strip())
+        }
+
+        # Add custom fields summary (entries were sanitized at load
+        # time, so every item here is a plain dict)
+        form_info['customFields'] = {
+            name: _pick_value(f)
+            for f in custom_values
+            for name in (f.get('itemLabel') or f.get('name'),)
+            if name
+        }
+
+        # Add tabular data summary
+        tabular_summary = {}
+        template_name = form.get('template_name')
+        for table_name, table_data in tabular_values.items():
+            # Column lists repeat across forms of the same template,
+            # so compute them once per (template, table)
+            key = (template_name, table_name)
+            cols = _COL_CACHE.get(key)
+            if cols is None:
+                # Only cache columns learned from a populated table; an
+                # empty one says nothing about the template's schema
+                if table_data:
+                    cols = list(table_data[0].keys())
+                    _COL_CACHE[key] = cols
+                else:
+                    cols = []
+            tabular_summary[table_name] = {
+                'rowCount': len(table_data),
+                'columns': cols
+            }
+
+        form_info['tabularData'] = tabular_summary
+        processed_data.append(form_info)
+        csv_rows.extend(_csv_rows_for_form(form))
+
+    payload = {'status': 'success', 'data': processed_data}
+    if orjson is not None:
+        return orjson.dumps(payload), csv_rows
+    return json.dumps(payload, default=str).encode(), csv_rows
+
+
+def _ensure_processed(state):
+    """Return (payload bytes, CSV rows) for a snapshot, rebuilding if stale
+
+    Normally a no-op lookup: the background loader warms both after each
+    fetch. The rebuild path covers snapshots adopted from the disk cache.
+    Reads the cache globals once into locals so a concurrent invalidation
+    by the loader can never hand a request a half-cleared (None) pair.
+    """
+
+    global _forms_json_cache, _forms_json_cache_key, _csv_rows_cache
+
+    payload, rows, key = _forms_json_cache, _csv_rows_cache, _forms_json_cache_key
+
+    # id() alone can alias: the loader's incremental snapshots free each
+    # intermediate forms list, and CPython may recycle its address for a
+    # later batch. The length disambiguates recycled ids mid-load.
+    cache_key = (id(state.forms), len(state.forms), state.last_update)
+    if payload is None or rows is None or cache_key != key:
+        payload, rows = _process_forms(state.forms)
+        _forms_json_cache, _csv_rows_cache = payload, rows
+        _forms_json_cache_key = cache_key
+    return payload, rows
+
+
+def load_forms_data_background():
+    """Load forms data in background thread"""
+    global STATE, _forms_json_cache, _forms_json_cache_key, _csv_rows_cache
+
+    # New data invalidates the cached payload, CSV rows and table schemas
+    _forms_json_cache = None
+    _forms_json_cache_key = None
+    _csv_rows_cache = None
+    _COL_CACHE.clear()
+
+    try:
+        if not authenticator or not authenticator.access_token:
+            STATE = replace(STATE, loading=False, error="No valid authentication token")
+            return
+        
+        # Get project ID
+        project_ids = os.getenv('AUTODESK_PROJECT_IDS', '').split(',')
+        if not project_ids[0]:
+            STATE = replace(STATE, loading=False, error="No project ID configured")
+            return
+        
+        project_id = project_ids[0].strip()
+
+        # A recent cached copy beats re-downloading the whole project
+        cache = _get_cache()
+        if cache is not None:
+            cached = cache.get(('forms', project_id))
+            if cached and time.time() - cached['ts'] < FORMS_CACHE_TTL:
+                STATE = DashboardState(
+                    forms=cached['forms'],
+                    last_update=datetime.fromtimestamp(cached['ts'])
+                )
+                logger.info(f"Loaded {len(cached['forms'])} forms from disk cache")
+                return
+
+        # Fetch forms data
+        logger.info("Fetching forms data in background...")
+        forms_client = AutodeskFormsClient(
+            authenticator.access_token,
+            max_workers=int(os.getenv('FETCH_WORKERS', '10')),
+            session=HTTP_SESSION
+        )
+        # Consume forms incrementally so /api/status can report progress
+        # (form count grows batch by batch) during a long fetch
+        forms = []
+        for batch in forms_client.iter_all_forms(project_id):
+            forms = forms + _normalize_forms(batch)
+            STATE = replace(STATE, forms=forms, loading=True)
+
+        if forms:
+            STATE = DashboardState(forms=forms, last_update=datetime.now())
+            if cache is not None:
+                cache.set(('forms', project_id), {'ts': time.time(), 'forms': forms}, expire=900)
+
+            # Shape, serialize and row-build once here so the first
+            # /api/forms-data and CSV export are served from the caches
+            _forms_json_cache, _csv_rows_cache = _process_forms(forms)
+            _forms_json_cache_key = (id(forms), len(forms), STATE.last_update)
+
+            logger.info(f"Successfully loaded {len(forms)} forms")
+        else:
+            STATE = DashboardState(error="No forms found in project")
+
+    except Exception as e:
+        logger.error(f"Error loading forms data: {e}")
+        STATE = replace(STATE, loading=False, error=str(e))
+
+def _state_etag(state):
+    """Weak ETag for a state snapshot
+
+    Changes whenever a poller would see different data: a finished load,
+    growing partial results, the loading flag flipping, or a new error.
+    """
+    ts = int(state.last_update.timestamp()) if state.last_update else 0
+    return f'W/"{ts}-{len(state.forms)}-{int(state.loading)}-{len(state.error or "")}"'
+
+
+def _etag_matches(etag):
+    """True when the request's If-None-Match matches our validator
+
+    Flask-Compress rewrites the ETag of compressed responses to
+    W/"...:gzip" (or the active algorithm), so the value a client echoes
+    back may carry that suffix; strip it before comparing or the 304
+    short-circuit never fires for gzip-accepting clients.
+    """
+    inm = request.headers.get('If-None-Match')
+    if not inm:
+        return False
+    if inm == etag:
+        return True
+    if inm.endswith('"') and ':' in inm:
+        return inm[:inm.rindex(':')] + '"' == etag
+    return False
+
+
+def _state_snapshot():
+    """Current state, hydrated from the shared disk cache if needed
+
+    Under gunicorn --preload with several workers, only the worker that
+    ran the load has forms in memory; the others pick them up from the
+    diskcache entry written by load_forms_data_background.
+    """
+    global STATE
+
+    state = STATE
+    cache = _get_cache()
+    if not state.forms and not state.loading and cache is not None:
+        project_ids = os.getenv('AUTODESK_PROJECT_IDS', '').split(',')
+        if project_ids[0]:
+            cached = cache.get(('forms', project_ids[0].strip()))
+            if cached:
+                state = DashboardState(
+                    forms=cached['forms'],
+                    last_update=datetime.fromtimestamp(cached['ts'])
+                )
+                STATE = state
+    return state
+
+
+# A single persistent worker drains fetch jobs, so repeated auths reuse
+# one thread and never run two loads that race on STATE. It starts on
+# first enqueue rather than at import: under gunicorn --preload a thread
+# started in the master would not survive the worker fork, leaving
+# queued jobs undrained forever.
+FETCH_QUEUE = queue.Queue(maxsize=4)
+_fetch_worker_lock = threading.Lock()
+_fetch_worker_thread = None
+
+
+def _fetch_worker():
+    while True:
+        FETCH_QUEUE.get()
+        try:
+            load_forms_data_background()
+        finally:
+            FETCH_QUEUE.task_done()
+
+
+def _enqueue_fetch():
+    """Queue a background load, starting the worker thread on first use"""
+    global _fetch_worker_thread
+
+    with _fetch_worker_lock:
+        if _fetch_worker_thread is None:
+            _fetch_worker_thread = threading.Thread(target=_fetch_worker, daemon=True)
+            _fetch_worker_thread.start()
+
+    try:
+        FETCH_QUEUE.put_nowait(None)
+    except queue.Full:
+        pass  # a load is already queued behind the running one
+
+@app.route('/api/load-data', methods=['POST'])
+def load_data():
+    """API endpoint to start authentication and load ACC Forms data"""
+    global STATE
+
+    if STATE.loading:
+        return ojsonify({'status': 'error', 'message': 'Data is already being loaded'})
+
+    try:
+        # Get configuration from environment
+        client_id = os.getenv('AUTODESK_CLIENT_ID')
+        client_secret = os.getenv('AUTODESK_CLIENT_SECRET')
+        project_ids = os.getenv('AUTODESK_PROJECT_IDS', '').split(',')
+
+        if not all([client_id, client_secret, project_ids[0]]):
+            return ojsonify({'status': 'error', 'message': 'Missing required environment variables'})
+
+        # With a live token the fetch just needs queueing; the request
+        # returns immediately and the dashboard follows /api/status
+        if authenticator and authenticator.access_token:
+            STATE = replace(STATE, loading=True, error=None)
+            _enqueue_fetch()
+            return ojsonify({
+                'status': 'accepted',
+                'message': 'Data load started. Poll /api/status for progress.'
+            }, status=202)
+
+        # Start authentication process
+        return ojsonify({
+            'status': 'auth_required',
+            'message': 'Authentication required. Please click the authentication link.',
+            'auth_url': '/auth/start'
+        })
+
+    except Exception as e:
+        logger.error(f"Error in load_data: {e}")
+        return ojsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/api/forms-data')
+def get_forms_data():
+    """API endpoint to get forms data as JSON"""
+    state = _state_snapshot()
+
+    if not state.forms:
+        return ojsonify({'status': 'error', 'message': 'No data loaded'})
+
+    # Pollers that already hold the current payload get a bodyless 304
+    etag = _state_etag(state)
+    if _etag_matches(etag):
+        return Response(status=304)
+
+    # The dashboard polls this endpoint, but the snapshot only changes
+    # when a load finishes - serve the serialization cached at load time
+    payload, _ = _ensure_processed(state)
+    return _json_response(payload, etag)
+
+@app.route('/api/export-csv')
+def export_csv():
+    """Export forms data as CSV file"""
+    state = _state_snapshot()
+
+    if not state.forms:
+        return ojsonify({'status': 'error', 'message': 'No data to export'})
+
+    # Rows were pre-built in the same pass that shaped the JSON payload,
+    # so the export only has to encode and stream them
+    _, csv_rows = _ensure_processed(state)
+
+    def generate():
+        # writerows keeps the per-row loop in C; rows land in a small
+        # buffer drained to the client every chunk, so the export never
+        # sits fully in RAM and the first bytes leave immediately. The
+        # buffer itself is kept per worker thread and reset per export.
+        output = getattr(_tls, 'csv_buf', None)
+        if output is None:
+            output = _tls.csv_buf = io.StringIO()
+        output.seek(0)
+        output.truncate(0)
+        writer = csv.writer(output)
+
+        writer.writerow(CSV_FIELDNAMES)
+
+        for start in range(0, len(csv_rows), CSV_CHUNK_ROWS):
+            writer.writerows(csv_rows[start:start + CSV_CHUNK_ROWS])
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+
+        # the header (and any short final chunk) may still be buffered
+        tail = output.getvalue()
+        if tail:
+            yield tail
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"ACC_Forms_Export_{timestamp}.csv"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@app.route('/api/status')
+def get_status():
+    """Get current loading status"""
+    state = _state_snapshot()
+
+    # The dashboard polls this every few seconds; an unchanged state
+    # costs only the If-None-Match comparison
+    etag = _state_etag(state)
+    if _etag_matches(etag):
+        return Response(status=304)
+
+    resp = ojsonify({
+        'is_loading': state.loading,
+        'forms_count': len(state.forms),
+        'last_update': state.last_update,
+        'error_message': state.error
+    })
+    resp.headers['ETag'] = etag
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+if __name__ == '__main__':
+    port = int(os.getenv('PORT', 5000))
+    debug = os.getenv('FLASK_ENV') == 'development'
+
+    if monkey is not None and not debug:
+        # One greenlet per request; blocking socket waits yield instead of
+        # tying up the process like the single-threaded dev server does
+        from gevent.pywsgi import WSGIServer
+
+        logger.info(f"Serving on 0.0.0.0:{port} with gevent")
+        WSGIServer(('0.0.0.0', port), app).serve_forever()
+    else:
+        # threaded=True so status polls aren't serialized behind slow handlers
+        # when running the dev server directly (gunicorn handles production)
+        app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
@@ -0,0 +1,16 @@
+"""Gunicorn configuration for production deploys
+
+gevent workers let one process overlap many Autodesk API waits, and
+--preload forks workers after imports so code and read-only data are
+shared copy-on-write. Loaded forms are shared across workers through
+the diskcache directory (see CACHE in app.py), so any worker can serve
+data fetched by another.
+"""
+
+import os
+
+workers = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 1)))
+worker_class = 'gevent'
+worker_connections = 1000
+preload_app = True
+timeout = 120